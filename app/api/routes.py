@@ -2,22 +2,84 @@
 API routes for property search functionality.
 """
 
+import asyncio
 import logging
-from typing import Annotated, Any, Dict, NamedTuple
+from functools import lru_cache
+from typing import Annotated, Any, Dict, List, NamedTuple, Optional
 
 import anthropic
 import httpx
-from fastapi import APIRouter, Depends, HTTPException, status
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
 
-from app.config import Settings, get_settings
+from app.config import get_settings
 from app.models.property import PropertyCriteria, SearchRequest, SearchResponse
 from app.services.claude_service import ClaudeService, get_claude_service
+from app.services.http_cache import cached, compute_etag
 from app.services.patma_service import PatmaService, get_patma_service
+from app.services.resilience import CircuitOpenError
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api", tags=["search"])
 
+# How long the read-only Patma passthrough responses stay fresh
+PASSTHROUGH_CACHE_TTL = 3600
+
+
+def _passthrough_response(
+    payload: Dict[str, Any],
+    request: Request,
+) -> Response:
+    """
+    Build a cacheable response for a Patma passthrough payload.
+
+    Serializes directly with orjson and skips response-model validation —
+    these endpoints intentionally pass Patma's schema through untouched.
+    Returns 304 if the client's If-None-Match matches the payload's ETag.
+    """
+    etag = compute_etag(payload)
+    headers = {
+        "Cache-Control": f"public, max-age={PASSTHROUGH_CACHE_TTL}",
+        "ETag": etag,
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return ORJSONResponse(content=payload, headers=headers)
+
+
+def _discard_task(task: asyncio.Task) -> None:
+    """
+    Cancel an unused task and consume any exception it ends with.
+
+    A prefetch task that failed before being awaited would otherwise
+    log "Task exception was never retrieved" at garbage collection.
+    """
+    task.cancel()
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+
+def _stream_search_response(response: SearchResponse):
+    """
+    Yield a SearchResponse as incrementally serialized JSON.
+
+    Headers and the first properties go on the wire before the whole
+    payload is encoded, so time-to-first-byte no longer scales with the
+    number of results.
+    """
+    yield b'{"criteria":' + response.criteria.model_dump_json().encode()
+    yield b',"properties":['
+    for i, prop in enumerate(response.properties):
+        if i:
+            yield b","
+        yield prop.model_dump_json().encode()
+    yield b'],"total_count":' + orjson.dumps(response.total_count)
+    yield b',"message":' + orjson.dumps(response.message)
+    yield b',"local_insights":' + orjson.dumps(response.local_insights)
+    yield b"}"
+
 
 class Services(NamedTuple):
     """Container for injected services."""
@@ -26,16 +88,21 @@ class Services(NamedTuple):
     patma: PatmaService
 
 
-def get_services(
-    settings: Annotated[Settings, Depends(get_settings)],
-) -> Services:
-    """Dependency that provides all required services."""
+@lru_cache(maxsize=1)
+def _build_services() -> Services:
+    """Build the Services container once; both members are singletons."""
+    settings = get_settings()
     return Services(
         claude=get_claude_service(settings),
         patma=get_patma_service(settings),
     )
 
 
+def get_services() -> Services:
+    """Dependency that provides all required services."""
+    return _build_services()
+
+
 @router.post(
     "/search",
     response_model=SearchResponse,
@@ -65,12 +132,25 @@ async def search_properties(
     Raises:
         HTTPException: If criteria extraction or property search fails.
     """
-    logger.info("Received search request: %s", request.query[:100])
+    # Guard so the query slice is only built when INFO logging is on
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Received search request: %s", request.query[:100])
+
+    # If the caller supplied a location hint, prefetch local insights in
+    # parallel with criteria extraction to hide Patma latency behind Claude
+    insights_task: Optional[asyncio.Task] = None
+    if request.hint_location:
+        insights_task = asyncio.create_task(
+            services.patma.get_local_insights(request.hint_location)
+        )
 
     try:
         # Step 1: Extract structured criteria from natural language
         criteria = await services.claude.extract_criteria(request.query)
-        logger.info("Extracted criteria: %s", criteria.model_dump())
+        # Serializing the criteria is pure logging overhead, so skip it
+        # entirely when INFO is filtered out
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Extracted criteria: %s", criteria.model_dump_json())
 
         # Step 2: Search for properties using Patma API
         properties = await services.patma.search_properties(
@@ -79,6 +159,20 @@ async def search_properties(
         )
         logger.info("Found %d matching properties", len(properties))
 
+        # Collect the prefetched insights, but only if the extracted
+        # criteria actually target the hinted location
+        local_insights = None
+        if insights_task is not None:
+            hint = request.hint_location.strip().lower()
+            if any(hint == location.strip().lower() for location in criteria.locations):
+                try:
+                    local_insights = await insights_task
+                except Exception as e:
+                    logger.warning("Local insights prefetch failed: %s", e)
+            else:
+                _discard_task(insights_task)
+                insights_task = None
+
         # Step 3: Build response message
         if properties:
             message = f"Found {len(properties)} properties matching your criteria."
@@ -90,11 +184,16 @@ async def search_properties(
                 "Try broadening your search or adjusting your requirements."
             )
 
-        return SearchResponse(
+        search_response = SearchResponse(
             criteria=criteria,
             properties=properties,
             total_count=len(properties),
             message=message,
+            local_insights=local_insights,
+        )
+        return StreamingResponse(
+            _stream_search_response(search_response),
+            media_type="application/json",
         )
 
     except ValueError as e:
@@ -132,6 +231,13 @@ async def search_properties(
             detail="Failed to connect to property search API. Please try again later.",
         ) from e
 
+    except CircuitOpenError as e:
+        logger.error("Upstream circuit open: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Upstream service is temporarily unavailable. Please try again later.",
+        ) from e
+
     except Exception as e:
         logger.exception("Unexpected error during search")
         raise HTTPException(
@@ -139,6 +245,12 @@ async def search_properties(
             detail=f"An unexpected error occurred: {type(e).__name__}: {e}",
         ) from e
 
+    finally:
+        # Don't leak the prefetch task — or its unretrieved exception —
+        # if the search failed before consuming it
+        if insights_task is not None:
+            _discard_task(insights_task)
+
 
 @router.post(
     "/extract-criteria",
@@ -179,19 +291,64 @@ async def extract_criteria(
         ) from e
 
 
+@router.post(
+    "/extract-criteria/batch",
+    response_model=List[PropertyCriteria],
+    summary="Extract criteria for multiple queries in bulk",
+    description=(
+        "Submit multiple queries through Anthropic's Message Batches API at "
+        "half the token cost. Batches complete within a 24 hour SLA, so this "
+        "endpoint is for offline workloads, not interactive search."
+    ),
+)
+async def extract_criteria_batch(
+    requests: List[SearchRequest],
+    services: Annotated[Services, Depends(get_services)],
+) -> List[PropertyCriteria]:
+    """
+    Extract property criteria for a batch of queries.
+
+    Intended for non-interactive callers such as evaluation runs or
+    precomputation of common queries.
+
+    Args:
+        requests: Search requests containing the natural language queries.
+        services: Injected services.
+
+    Returns:
+        List of PropertyCriteria in the same order as the input queries.
+    """
+    try:
+        return await services.claude.extract_criteria_batch(
+            [request.query for request in requests]
+        )
+
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e),
+        ) from e
+
+    except anthropic.APIStatusError as e:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Claude API error: {e.message}",
+        ) from e
+
+
 @router.get(
     "/sold-prices/{location}",
-    response_model=Dict[str, Any],
     summary="Get sold price data for a location",
     description="Get historical sold price statistics for a given location.",
 )
 async def get_sold_prices(
     location: str,
     services: Annotated[Services, Depends(get_services)],
+    request: Request,
     property_type: str = "house",
     bedrooms: int = None,
     max_age_months: int = 24,
-) -> Dict[str, Any]:
+) -> Response:
     """
     Get sold price statistics for a location.
 
@@ -208,11 +365,16 @@ async def get_sold_prices(
         Dictionary with sold price statistics.
     """
     try:
-        stats = await services.patma.get_sold_prices(
-            location=location,
-            property_type=property_type,
-            bedrooms=bedrooms,
-            max_age_months=max_age_months,
+        cache_key = f"sold:{location}:{property_type}:{bedrooms}:{max_age_months}"
+        stats = await cached(
+            cache_key,
+            PASSTHROUGH_CACHE_TTL,
+            lambda: services.patma.get_sold_prices(
+                location=location,
+                property_type=property_type,
+                bedrooms=bedrooms,
+                max_age_months=max_age_months,
+            ),
         )
 
         if not stats:
@@ -221,7 +383,7 @@ async def get_sold_prices(
                 detail=f"No price data found for location: {location}",
             )
 
-        return stats
+        return _passthrough_response(stats, request)
 
     except httpx.HTTPStatusError as e:
         logger.error("Patma API error: %s", e)
@@ -230,18 +392,25 @@ async def get_sold_prices(
             detail=f"Property data API error: {e.response.status_code}",
         ) from e
 
+    except CircuitOpenError as e:
+        logger.error("Patma circuit open: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Property data API is temporarily unavailable. Please try again later.",
+        ) from e
+
 
 @router.get(
     "/price-history/{location}",
-    response_model=Dict[str, Any],
     summary="Get price history for a location",
     description="Get historical price trends (UKHPI data) for a location.",
 )
 async def get_price_history(
     location: str,
     services: Annotated[Services, Depends(get_services)],
+    request: Request,
     property_type: str = None,
-) -> Dict[str, Any]:
+) -> Response:
     """
     Get price history trends for a location.
 
@@ -257,9 +426,14 @@ async def get_price_history(
         Dictionary with monthly price history and trends.
     """
     try:
-        history = await services.patma.get_price_history(
-            location=location,
-            property_type=property_type,
+        cache_key = f"history:{location}:{property_type}"
+        history = await cached(
+            cache_key,
+            PASSTHROUGH_CACHE_TTL,
+            lambda: services.patma.get_price_history(
+                location=location,
+                property_type=property_type,
+            ),
         )
 
         if not history:
@@ -268,7 +442,7 @@ async def get_price_history(
                 detail=f"No price history found for location: {location}",
             )
 
-        return history
+        return _passthrough_response(history, request)
 
     except httpx.HTTPStatusError as e:
         logger.error("Patma API error: %s", e)
@@ -277,17 +451,24 @@ async def get_price_history(
             detail=f"Property data API error: {e.response.status_code}",
         ) from e
 
+    except CircuitOpenError as e:
+        logger.error("Patma circuit open: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Property data API is temporarily unavailable. Please try again later.",
+        ) from e
+
 
 @router.get(
     "/local-insights/{location}",
-    response_model=Dict[str, Any],
     summary="Get local area insights",
     description="Get local area data including schools, crime rates, and demographics.",
 )
 async def get_local_insights(
     location: str,
     services: Annotated[Services, Depends(get_services)],
-) -> Dict[str, Any]:
+    request: Request,
+) -> Response:
     """
     Get local area insights for a location.
 
@@ -304,7 +485,11 @@ async def get_local_insights(
         Dictionary with combined local insights data.
     """
     try:
-        insights = await services.patma.get_local_insights(location=location)
+        insights = await cached(
+            f"insights:{location}",
+            PASSTHROUGH_CACHE_TTL,
+            lambda: services.patma.get_local_insights(location=location),
+        )
 
         if not insights:
             raise HTTPException(
@@ -312,7 +497,7 @@ async def get_local_insights(
                 detail=f"No local data found for location: {location}",
             )
 
-        return insights
+        return _passthrough_response(insights, request)
 
     except httpx.HTTPStatusError as e:
         logger.error("Patma API error: %s", e)
@@ -320,3 +505,10 @@ async def get_local_insights(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail=f"Property data API error: {e.response.status_code}",
         ) from e
+
+    except CircuitOpenError as e:
+        logger.error("Patma circuit open: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Property data API is temporarily unavailable. Please try again later.",
+        ) from e
@@ -13,10 +13,13 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 class Settings(BaseSettings):
     """Application settings loaded from environment variables."""
 
+    # frozen makes the settings immutable and hashable, so instances are
+    # safe to share across requests and usable as lru_cache keys
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
         case_sensitive=False,
+        frozen=True,
     )
 
     # API Keys
@@ -25,7 +28,14 @@ class Settings(BaseSettings):
 
     # Claude configuration
     claude_model: str = "claude-sonnet-4-20250514"
-    claude_max_tokens: int = 1024
+    # Criteria extraction is a small JSON-emission task, so it runs on the
+    # faster, cheaper Haiku model; claude_model stays available for any
+    # future endpoint that needs more capability.
+    claude_extraction_model: str = "claude-3-5-haiku-20241022"
+    claude_max_tokens: int = 384
+    # Extraction must be deterministic: the exact-hash criteria cache only
+    # works if identical queries produce identical output
+    claude_temperature: float = 0.0
 
     # Patma API configuration
     patma_base_url: str = "https://app.patma.co.uk/api"
@@ -10,9 +10,12 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from app.api import router
 from app.config import get_settings
+from app.services.claude_service import get_claude_service
+from app.services.patma_service import get_patma_service
 
 # Configure logging
 logging.basicConfig(
@@ -41,6 +44,10 @@ async def lifespan(app: FastAPI):
 
     logger.info("Configuration validated successfully")
     yield
+
+    # Close pooled HTTP clients held by the service singletons
+    await get_claude_service(settings).close()
+    await get_patma_service(settings).close()
     logger.info("Shutting down %s", settings.app_name)
 
 
@@ -61,6 +68,9 @@ def create_app() -> FastAPI:
             "property requirements and find matching UK property listings."
         ),
         lifespan=lifespan,
+        # orjson serializes the nested SearchResponse payloads several
+        # times faster than the stdlib json default
+        default_response_class=ORJSONResponse,
     )
 
     # Configure CORS for frontend access
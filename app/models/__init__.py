@@ -1,4 +1,5 @@
 from .property import (
+    CRITERIA_JSON_SCHEMA,
     PropertyCriteria,
     SearchRequest,
     Property,
@@ -6,6 +7,7 @@ from .property import (
 )
 
 __all__ = [
+    "CRITERIA_JSON_SCHEMA",
     "PropertyCriteria",
     "SearchRequest",
     "Property",
@@ -5,7 +5,7 @@ These models define the data structures used throughout the application
 for API requests, responses, and internal data representation.
 """
 
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -69,6 +69,13 @@ class SearchRequest(BaseModel):
             "Looking for a modern 2-bedroom flat in London Zone 2, max budget £600k",
         ],
     )
+    hint_location: Optional[str] = Field(
+        default=None,
+        description=(
+            "Optional location hint (e.g. a postcode) used to prefetch local "
+            "area insights while the query is being parsed"
+        ),
+    )
 
 
 class Property(BaseModel):
@@ -111,3 +118,18 @@ class SearchResponse(BaseModel):
         default=None,
         description="Optional message about the search results",
     )
+    local_insights: Optional[Dict[str, Any]] = Field(
+        default=None,
+        description="Local area insights prefetched for the hint location",
+    )
+
+
+# Warm the Pydantic core schemas at import time so the first request
+# doesn't pay a schema-build stall, and cache the criteria JSON schema
+# used by the Claude tool definition.
+PropertyCriteria.model_rebuild()
+SearchRequest.model_rebuild()
+Property.model_rebuild()
+SearchResponse.model_rebuild()
+
+CRITERIA_JSON_SCHEMA = PropertyCriteria.model_json_schema()
@@ -5,41 +5,68 @@ Uses the Anthropic SDK to parse natural language property descriptions
 into structured PropertyCriteria objects.
 """
 
+import asyncio
 import json
 import logging
-from typing import Optional
+from functools import lru_cache
+from typing import Any, Dict, List
 
-from anthropic import AsyncAnthropic
+import httpx
+from anthropic import (
+    APIConnectionError,
+    AsyncAnthropic,
+    InternalServerError,
+    RateLimitError,
+)
 
-from app.config import Settings
-from app.models.property import PropertyCriteria
+from app.config import Settings, get_settings
+from app.models.property import CRITERIA_JSON_SCHEMA, PropertyCriteria
+from app.services.criteria_cache import CriteriaCache, normalize_query
+from app.services.resilience import CircuitBreaker, retry
 
 logger = logging.getLogger(__name__)
 
-# System prompt that instructs Claude how to extract property criteria
-EXTRACTION_SYSTEM_PROMPT = """You are a property search assistant that extracts structured search criteria from natural language descriptions.
+# System prompt that instructs Claude how to extract property criteria.
+# The JSON shape is injected from the Pydantic schema below so the prompt
+# can never drift from the model it is parsed into.
+_EXTRACTION_PROMPT_TEMPLATE = """You are a property search assistant that extracts structured search criteria from natural language descriptions.
 
-Your task is to parse the user's property requirements and return a JSON object with the following structure:
+Your task is to parse the user's property requirements and call the emit_criteria tool with a JSON object matching this schema:
 
-{
-    "min_bedrooms": <integer or null>,
-    "max_bedrooms": <integer or null>,
-    "min_price": <integer in GBP or null>,
-    "max_price": <integer in GBP or null>,
-    "locations": [<list of location strings: cities, towns, areas, postcodes>],
-    "property_types": [<list of property types: "house", "flat", "apartment", "bungalow", "terraced", "semi-detached", "detached", "cottage", "maisonette">],
-    "preferences": [<list of desired features: "garden", "parking", "garage", "modern kitchen", "ensuite", "good schools", "quiet area", etc.>],
-    "deal_breakers": [<list of things to avoid: "no garden", "busy road", "ex-council", etc.>]
-}
+{schema}
 
 Guidelines:
+- Property types include: "house", "flat", "apartment", "bungalow", "terraced", "semi-detached", "detached", "cottage", "maisonette"
 - Extract explicit requirements from the text
 - Convert price mentions to integers (e.g., "£400k" = 400000, "half a million" = 500000)
 - Normalize location names (e.g., "Greater Manchester" is fine, but also extract specific areas if mentioned)
 - Be liberal with preferences - include anything that sounds like a desired feature
 - Only include deal_breakers for things explicitly mentioned as unwanted
-- If something isn't mentioned, use null for numbers or empty list for arrays
-- Return ONLY the JSON object, no additional text or explanation"""
+- If something isn't mentioned, use null for numbers or empty list for arrays"""
+
+# Serialized with sorted keys so the prompt stays byte-identical across
+# process restarts — any prefix change would invalidate the prompt cache
+_SCHEMA_JSON = json.dumps(CRITERIA_JSON_SCHEMA, sort_keys=True, indent=2)
+
+EXTRACTION_SYSTEM_PROMPT = _EXTRACTION_PROMPT_TEMPLATE.format(schema=_SCHEMA_JSON)
+
+# Tool definition that forces Claude to emit schema-validated criteria.
+# The schema is static, so it is cached alongside the system prompt.
+# Errors that mean the Claude API itself is struggling. These are the
+# ones worth retrying and the only ones that may open the circuit —
+# client errors (e.g. BadRequestError) reflect our request, not an
+# outage, and must not count toward failing fast.
+_TRANSIENT_API_ERRORS = (APIConnectionError, RateLimitError, InternalServerError)
+
+CRITERIA_TOOL = {
+    "name": "emit_criteria",
+    "description": (
+        "Record the structured property search criteria extracted from the "
+        "user's natural language description."
+    ),
+    "input_schema": CRITERIA_JSON_SCHEMA,
+    "cache_control": {"type": "ephemeral"},
+}
 
 
 class ClaudeService:
@@ -52,9 +79,41 @@ class ClaudeService:
         Args:
             settings: Application settings containing API configuration.
         """
-        self.client = AsyncAnthropic(api_key=settings.anthropic_api_key)
+        # Explicit httpx client with keep-alive and HTTP/2 so repeat calls
+        # reuse warm connections instead of re-doing TCP+TLS handshakes
+        self._http = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(
+                max_keepalive_connections=50,
+                max_connections=100,
+                keepalive_expiry=60,
+            ),
+            timeout=httpx.Timeout(30.0, connect=5.0),
+        )
+        self.client = AsyncAnthropic(
+            api_key=settings.anthropic_api_key,
+            http_client=self._http,
+        )
         self.model = settings.claude_model
+        self.extraction_model = settings.claude_extraction_model
         self.max_tokens = settings.claude_max_tokens
+        self.temperature = settings.claude_temperature
+        self.cache = CriteriaCache()
+        # In-flight extractions keyed by normalized query, so concurrent
+        # identical requests share a single outbound Claude call.
+        self._inflight: Dict[str, "asyncio.Future[PropertyCriteria]"] = {}
+        # Cap concurrent outbound calls and fail fast when the API is down,
+        # so a Claude outage can't starve the event loop or trigger a
+        # retry storm against Anthropic
+        self._sem = asyncio.Semaphore(20)
+        self._breaker = CircuitBreaker(
+            "claude",
+            is_failure=lambda exc: isinstance(exc, _TRANSIENT_API_ERRORS),
+        )
+
+    async def close(self) -> None:
+        """Close the underlying HTTP client."""
+        await self._http.aclose()
 
     async def extract_criteria(self, query: str) -> PropertyCriteria:
         """
@@ -70,48 +129,189 @@ class ClaudeService:
             ValueError: If Claude's response cannot be parsed as valid criteria.
             anthropic.APIError: If the API request fails.
         """
-        logger.info("Extracting criteria from query: %s", query[:100])
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Extracting criteria from query: %s", query[:100])
+
+        cached = self.cache.get(query)
+        if cached is not None:
+            logger.info("Returning cached criteria for query: %s", query[:100])
+            return cached
+
+        # Coalesce concurrent identical queries onto a single live call
+        key = normalize_query(query)
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            logger.info("Awaiting in-flight extraction for query: %s", query[:100])
+            return await inflight
+
+        future: "asyncio.Future[PropertyCriteria]" = (
+            asyncio.get_running_loop().create_future()
+        )
+        self._inflight[key] = future
+        try:
+            criteria = await self._extract_criteria_live(query)
+            future.set_result(criteria)
+            return criteria
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved in case no one else is waiting
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _extract_criteria_live(self, query: str) -> PropertyCriteria:
+        """
+        Perform the actual Claude call and parse the response.
+
+        Args:
+            query: Natural language description of property requirements.
 
-        message = await self.client.messages.create(
-            model=self.model,
-            max_tokens=self.max_tokens,
-            system=EXTRACTION_SYSTEM_PROMPT,
-            messages=[
+        Returns:
+            PropertyCriteria object with extracted search parameters.
+        """
+        params = self._build_extraction_params(query)
+
+        async with self._sem:
+            message = await self._breaker.call(
+                lambda: retry(
+                    lambda: self.client.messages.create(**params),
+                    retry_on=_TRANSIENT_API_ERRORS,
+                )
+            )
+
+        # Log cache effectiveness so the prompt-cache hit rate is observable
+        usage = message.usage
+        logger.info(
+            "Prompt cache usage: read=%s created=%s",
+            getattr(usage, "cache_read_input_tokens", None),
+            getattr(usage, "cache_creation_input_tokens", None),
+        )
+
+        criteria = self._parse_tool_response(message)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "Successfully extracted criteria: %s", criteria.model_dump_json()
+            )
+        self.cache.set(query, criteria)
+        return criteria
+
+    async def extract_criteria_batch(
+        self,
+        queries: List[str],
+        poll_interval: float = 5.0,
+    ) -> List[PropertyCriteria]:
+        """
+        Extract criteria for many queries via the Message Batches API.
+
+        Batched requests are billed at half the token price, so this is the
+        right path for offline work (evaluation, precomputing common
+        queries). Batches only guarantee completion within 24 hours, so this
+        must NOT be used for interactive search traffic.
+
+        Args:
+            queries: Natural language queries to extract criteria from.
+            poll_interval: Seconds between batch status polls.
+
+        Returns:
+            PropertyCriteria for each query, in input order.
+
+        Raises:
+            ValueError: If any entry in the batch fails.
+        """
+        requests = [
+            {
+                "custom_id": f"query-{i}",
+                "params": self._build_extraction_params(query),
+            }
+            for i, query in enumerate(queries)
+        ]
+
+        batch = await self.client.beta.messages.batches.create(requests=requests)
+        logger.info(
+            "Submitted extraction batch %s with %d queries", batch.id, len(queries)
+        )
+
+        while batch.processing_status == "in_progress":
+            await asyncio.sleep(poll_interval)
+            batch = await self.client.beta.messages.batches.retrieve(batch.id)
+
+        # Results arrive in arbitrary order; reassemble by custom_id
+        criteria_by_id: Dict[str, PropertyCriteria] = {}
+        async for entry in await self.client.beta.messages.batches.results(batch.id):
+            if entry.result.type != "succeeded":
+                logger.error(
+                    "Batch entry %s failed: %s", entry.custom_id, entry.result.type
+                )
+                raise ValueError(
+                    f"Batch extraction failed for {entry.custom_id}: "
+                    f"{entry.result.type}"
+                )
+            criteria_by_id[entry.custom_id] = self._parse_tool_response(
+                entry.result.message
+            )
+
+        return [criteria_by_id[f"query-{i}"] for i in range(len(queries))]
+
+    def _build_extraction_params(self, query: str) -> Dict[str, Any]:
+        """
+        Build the messages.create parameters for a single extraction.
+
+        Shared between the live call and the batch path so both use the
+        same prompt, tool definition, and cache configuration.
+
+        Temperature defaults to 0 because extraction has to be
+        deterministic for the exact-hash criteria cache to be correct.
+        """
+        return {
+            "model": self.extraction_model,
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+            # Structured system block with cache_control so the static prompt
+            # prefix is served from Anthropic's prompt cache on repeat calls.
+            "system": [
+                {
+                    "type": "text",
+                    "text": EXTRACTION_SYSTEM_PROMPT,
+                    "cache_control": {"type": "ephemeral"},
+                }
+            ],
+            "tools": [CRITERIA_TOOL],
+            "tool_choice": {"type": "tool", "name": "emit_criteria"},
+            "messages": [
                 {
                     "role": "user",
                     "content": f"Extract property search criteria from this description:\n\n{query}",
                 }
             ],
-        )
+        }
 
-        # Extract the text response
-        response_text = message.content[0].text
-        logger.debug("Claude response: %s", response_text)
+    @staticmethod
+    def _parse_tool_response(message: Any) -> PropertyCriteria:
+        """
+        Pull the emit_criteria tool call out of a Claude message.
 
-        # Parse the JSON response
-        try:
-            # Handle potential markdown code blocks in response
-            cleaned_response = response_text.strip()
-            if cleaned_response.startswith("```"):
-                # Remove markdown code block formatting
-                lines = cleaned_response.split("\n")
-                # Remove first line (```json) and last line (```)
-                cleaned_response = "\n".join(lines[1:-1])
-
-            criteria_dict = json.loads(cleaned_response)
-            criteria = PropertyCriteria.model_validate(criteria_dict)
-            logger.info("Successfully extracted criteria: %s", criteria.model_dump())
-            return criteria
+        The forced tool call returns a schema-validated dict directly,
+        so there is no freeform JSON to clean up or parse.
 
-        except json.JSONDecodeError as e:
-            logger.error("Failed to parse Claude response as JSON: %s", e)
-            raise ValueError(
-                f"Failed to parse property criteria from response: {response_text}"
-            ) from e
+        Raises:
+            ValueError: If the message contains no emit_criteria call.
+        """
+        for block in message.content:
+            if block.type == "tool_use" and block.name == "emit_criteria":
+                return PropertyCriteria.model_validate(block.input)
+
+        logger.error("Claude response contained no emit_criteria tool call")
+        raise ValueError(
+            "Failed to extract property criteria: no tool call in response"
+        )
 
 
 # Dependency injection helper for FastAPI
-_claude_service: Optional[ClaudeService] = None
+@lru_cache(maxsize=1)
+def _build_claude_service() -> ClaudeService:
+    """Construct the single ClaudeService instance for this process."""
+    return ClaudeService(get_settings())
 
 
 def get_claude_service(settings: Settings) -> ClaudeService:
@@ -119,9 +319,7 @@ def get_claude_service(settings: Settings) -> ClaudeService:
     Get or create the Claude service singleton.
 
     This allows for dependency injection in FastAPI routes while
-    maintaining a single client instance.
+    maintaining a single client instance. Backed by lru_cache rather
+    than a mutable module global, so lazy init is safe under threads.
     """
-    global _claude_service
-    if _claude_service is None:
-        _claude_service = ClaudeService(settings)
-    return _claude_service
+    return _build_claude_service()
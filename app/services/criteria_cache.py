@@ -0,0 +1,172 @@
+"""
+Two-tier cache for extracted property criteria.
+
+Avoids repeated Claude API calls for queries we have already parsed.
+Tier 1 is an exact-match LRU keyed by a SHA-256 of the normalized query.
+Tier 2 is an optional semantic match using sentence embeddings, so
+rephrasings of the same search ("3-bed house" vs "three bedroom house")
+can reuse an existing result. The embedding tier is only active when
+sentence-transformers is installed; otherwise the cache silently runs
+in exact-match-only mode.
+"""
+
+import hashlib
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from app.models.property import PropertyCriteria
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+
+    _EMBEDDINGS_AVAILABLE = True
+except ImportError:
+    _EMBEDDINGS_AVAILABLE = False
+
+# Small, fast local model - only loaded if the optional dependency exists
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query for cache keying: lowercase, collapse whitespace."""
+    return _WHITESPACE_RE.sub(" ", query.strip().lower())
+
+
+def _hash_query(normalized_query: str) -> str:
+    """SHA-256 hex digest of a normalized query."""
+    return hashlib.sha256(normalized_query.encode("utf-8")).hexdigest()
+
+
+class CriteriaCache:
+    """
+    Bounded LRU cache mapping natural language queries to PropertyCriteria.
+
+    Entries expire after a TTL so stale extractions don't linger. Criteria
+    are stored as JSON strings and re-validated on retrieval, so callers
+    never share a mutable model instance.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        ttl_seconds: float = 3600.0,
+        similarity_threshold: float = 0.92,
+    ) -> None:
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of entries before LRU eviction.
+            ttl_seconds: Time-to-live for each entry.
+            similarity_threshold: Minimum cosine similarity for a semantic hit.
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+
+        # key -> (timestamp, criteria_json)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        # key -> unit-norm embedding vector (mirror of _entries)
+        self._embeddings: "OrderedDict[str, object]" = OrderedDict()
+        self._model = None
+
+    def _embed(self, normalized_query: str):
+        """Embed a query into a unit-norm vector, or None if unavailable."""
+        if not _EMBEDDINGS_AVAILABLE:
+            return None
+        if self._model is None:
+            logger.info("Loading embedding model %s", EMBEDDING_MODEL_NAME)
+            self._model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+        vector = self._model.encode(normalized_query).astype(np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _evict_expired(self) -> None:
+        """Drop entries older than the TTL."""
+        cutoff = time.monotonic() - self.ttl_seconds
+        expired = [key for key, (ts, _) in self._entries.items() if ts < cutoff]
+        for key in expired:
+            del self._entries[key]
+            self._embeddings.pop(key, None)
+
+    def get(self, query: str) -> Optional[PropertyCriteria]:
+        """
+        Look up criteria for a query.
+
+        Tries an exact match on the normalized query first, then a semantic
+        match if embeddings are available.
+
+        Args:
+            query: Raw natural language query.
+
+        Returns:
+            Cached PropertyCriteria, or None on miss.
+        """
+        self._evict_expired()
+        normalized = normalize_query(query)
+        key = _hash_query(normalized)
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            logger.debug("Criteria cache exact hit for query: %s", normalized[:80])
+            return PropertyCriteria.model_validate_json(entry[1])
+
+        return self._semantic_lookup(normalized)
+
+    def _semantic_lookup(self, normalized_query: str) -> Optional[PropertyCriteria]:
+        """Find the closest cached query by cosine similarity."""
+        if not self._embeddings:
+            return None
+
+        query_vector = self._embed(normalized_query)
+        if query_vector is None:
+            return None
+
+        keys = list(self._embeddings.keys())
+        matrix = np.stack(list(self._embeddings.values()))
+        similarities = matrix @ query_vector
+        best = int(np.argmax(similarities))
+
+        if similarities[best] >= self.similarity_threshold:
+            key = keys[best]
+            self._entries.move_to_end(key)
+            logger.debug(
+                "Criteria cache semantic hit (%.3f) for query: %s",
+                float(similarities[best]),
+                normalized_query[:80],
+            )
+            return PropertyCriteria.model_validate_json(self._entries[key][1])
+
+        return None
+
+    def set(self, query: str, criteria: PropertyCriteria) -> None:
+        """
+        Store extracted criteria for a query.
+
+        Args:
+            query: Raw natural language query.
+            criteria: Criteria extracted for that query.
+        """
+        normalized = normalize_query(query)
+        key = _hash_query(normalized)
+
+        self._entries[key] = (time.monotonic(), criteria.model_dump_json())
+        self._entries.move_to_end(key)
+
+        embedding = self._embed(normalized)
+        if embedding is not None:
+            self._embeddings[key] = embedding
+            self._embeddings.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            evicted_key, _ = self._entries.popitem(last=False)
+            self._embeddings.pop(evicted_key, None)
@@ -0,0 +1,92 @@
+"""
+DataLoader-style micro-batching for per-key upstream lookups.
+
+Patma's area endpoints take a single postcode per request, so callers
+that need several postcodes at once (multi-location searches, several
+chat sessions) become a chatty one-call-per-postcode pattern. The
+loader collects keys requested within a short window, deduplicates
+them, and flushes the batch as one bounded concurrent fan-out. If an
+upstream ever grows multi-key support, only the flush needs to change.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, List
+
+logger = logging.getLogger(__name__)
+
+
+class DataLoader:
+    """
+    Coalesce per-key async lookups into windowed, bounded batches.
+
+    Calls to load() within the batching window share one flush: each
+    distinct key is fetched once, and every waiter for that key gets
+    the same result (or exception).
+    """
+
+    def __init__(
+        self,
+        fetch_one: Callable[[Hashable], Awaitable[Any]],
+        window: float = 0.005,
+        max_concurrency: int = 10,
+    ) -> None:
+        """
+        Initialize the loader.
+
+        Args:
+            fetch_one: Coroutine function fetching the value for one key.
+            window: Seconds to wait collecting keys before flushing.
+            max_concurrency: Concurrent upstream calls per flush.
+        """
+        self._fetch_one = fetch_one
+        self.window = window
+        self._sem = asyncio.Semaphore(max_concurrency)
+        self._pending: Dict[Hashable, List[asyncio.Future]] = {}
+        self._flush_handle = None
+
+    async def load(self, key: Hashable) -> Any:
+        """
+        Request the value for key, joining the current batch window.
+
+        Args:
+            key: Hashable key identifying the lookup.
+
+        Returns:
+            The fetched value for the key.
+        """
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future = loop.create_future()
+        self._pending.setdefault(key, []).append(future)
+
+        if self._flush_handle is None:
+            self._flush_handle = loop.call_later(
+                self.window, lambda: loop.create_task(self._flush())
+            )
+
+        return await future
+
+    async def _flush(self) -> None:
+        """Fetch every pending key concurrently and resolve its waiters."""
+        self._flush_handle = None
+        pending, self._pending = self._pending, {}
+        keys = list(pending)
+        logger.debug("Flushing loader batch of %d keys", len(keys))
+
+        async def run(key: Hashable) -> Any:
+            async with self._sem:
+                try:
+                    return await self._fetch_one(key)
+                except Exception as e:
+                    return e
+
+        results = await asyncio.gather(*(run(key) for key in keys))
+
+        for key, result in zip(keys, results):
+            for future in pending[key]:
+                if future.cancelled():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
@@ -0,0 +1,134 @@
+"""
+In-process TTL cache for read-only passthrough endpoints.
+
+The Patma statistics endpoints are pure functions of their URL params
+over slow-changing upstream data, so repeat calls within a TTL can be
+served from memory instead of hitting Patma again. Also provides the
+ETag helper used for HTTP conditional responses.
+"""
+
+import asyncio
+import functools
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+# Default bound keeps memory predictable under key churn
+DEFAULT_MAX_ENTRIES = 1024
+
+
+class TTLCache:
+    """Bounded LRU cache where each entry carries its own expiry time."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of entries before LRU eviction.
+        """
+        self.max_entries = max_entries
+        # key -> (expires_at, value)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None if missing/expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """Store value under key for ttl seconds."""
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+# Shared cache instance for the passthrough endpoints
+_cache = TTLCache()
+
+
+async def cached(
+    key: str,
+    ttl: float,
+    fetch: Callable[[], Awaitable[Any]],
+) -> Any:
+    """
+    Return the cached value for key, fetching and storing it on a miss.
+
+    Args:
+        key: Cache key identifying the upstream call and its parameters.
+        ttl: Seconds the fetched value stays fresh.
+        fetch: Zero-argument coroutine function performing the upstream call.
+
+    Returns:
+        The cached or freshly fetched value.
+    """
+    value = _cache.get(key)
+    if value is not None:
+        return value
+
+    value = await fetch()
+    _cache.set(key, value, ttl)
+    return value
+
+
+def async_ttl_cache(ttl: float, max_entries: int = DEFAULT_MAX_ENTRIES):
+    """
+    Cache an async method's results for ttl seconds.
+
+    Keys on the call arguments (excluding self, since the services are
+    singletons). Concurrent misses for the same key share one upstream
+    call via a per-key lock, and falsy results are not cached so an
+    empty upstream response doesn't stick for the whole TTL.
+
+    Args:
+        ttl: Seconds a cached result stays fresh.
+        max_entries: Bound on the per-method cache before LRU eviction.
+    """
+
+    def decorator(func: Callable[..., Awaitable[Any]]):
+        cache = TTLCache(max_entries)
+        locks: Dict[str, asyncio.Lock] = {}
+
+        @functools.wraps(func)
+        async def wrapper(self, *args: Any, **kwargs: Any) -> Any:
+            key = f"{args!r}:{sorted(kwargs.items())!r}"
+            value = cache.get(key)
+            if value is not None:
+                return value
+
+            lock = locks.setdefault(key, asyncio.Lock())
+            async with lock:
+                # Another waiter may have populated the cache meanwhile
+                value = cache.get(key)
+                if value is None:
+                    try:
+                        value = await func(self, *args, **kwargs)
+                        if value:
+                            cache.set(key, value, ttl)
+                    finally:
+                        locks.pop(key, None)
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+def compute_etag(payload: Any) -> str:
+    """Compute a stable ETag for a JSON-serializable payload."""
+    serialized = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.md5(serialized.encode("utf-8")).hexdigest()
@@ -7,13 +7,21 @@ location and criteria extracted from natural language queries.
 API Documentation: https://app.patma.co.uk/api/doc/
 """
 
+import asyncio
+import heapq
 import logging
+import re
+from functools import lru_cache
 from typing import Any, Dict, List, Optional
 
 import httpx
+import orjson
 
-from app.config import Settings
+from app.config import Settings, get_settings
 from app.models.property import Property, PropertyCriteria
+from app.services.dataloader import DataLoader
+from app.services.http_cache import async_ttl_cache
+from app.services.resilience import CircuitBreaker, retry
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +39,75 @@ PROPERTY_TYPE_MAP = {
     "maisonette": "flat",
 }
 
+# Alias keys for listing fields, checked in order of preference; Patma
+# payloads vary by portal so each field can arrive under several names
+_ID_KEYS = ("id", "portal_id")
+_ADDRESS_KEYS = ("address", "full_address")
+_PRICE_KEYS = ("price", "asking_price", "current_price")
+_TYPE_KEYS = ("property_type", "type")
+_DESCRIPTION_KEYS = ("description", "summary")
+_URL_KEYS = ("portal_url", "url", "link")
+_IMAGE_KEYS = ("image_url", "main_image")
+_LATITUDE_KEYS = ("latitude", "lat")
+_LONGITUDE_KEYS = ("longitude", "lng")
+
+# Strips currency formatting from string prices in a single pass
+_PRICE_TRANS = str.maketrans("", "", ",£")
+
+
+def _first(item: Dict, keys: tuple, default: Any = None) -> Any:
+    """Return the first non-None value among the alias keys."""
+    for key in keys:
+        value = item.get(key)
+        if value is not None:
+            return value
+    return default
+
+
+def _as_int(value: Any) -> Optional[int]:
+    """Coerce a portal-supplied value to int, or None if absent/invalid."""
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _as_float(value: Any) -> Optional[float]:
+    """Coerce a portal-supplied value to float, or None if absent/invalid."""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_upstream_failure(exc: BaseException) -> bool:
+    """
+    Whether an exception indicates Patma itself is unhealthy.
+
+    Transport errors, 5xx responses, and 429s count toward opening the
+    circuit; other 4xx responses are caller mistakes (unknown location,
+    bad params) that reached Patma fine and must not trip the breaker.
+    """
+    if isinstance(exc, httpx.HTTPStatusError):
+        code = exc.response.status_code
+        return code >= 500 or code == 429
+    return isinstance(exc, httpx.RequestError)
+
+
+# Preference keywords that map to Patma listing filters, matched in a
+# single pass over the preferences list
+_PREF_RE = re.compile(r"(no chain|refurb|renovation|reduced|discount)", re.IGNORECASE)
+
+# Cache TTLs for the idempotent GET wrappers, scaled to how fast the
+# underlying data moves
+PRICE_CACHE_TTL = 300  # asking/sold prices
+AREA_CACHE_TTL = 3600  # schools, crime, demographics, UKHPI history
+STAMP_DUTY_CACHE_TTL = 86400  # changes only at fiscal events
+
 
 class PatmaService:
     """Service for interacting with Patma property data API."""
@@ -44,18 +121,110 @@ class PatmaService:
         """
         self.api_key = settings.patma_api_key
         self.base_url = settings.patma_base_url.rstrip("/")
-        self.client = httpx.AsyncClient(
-            timeout=30.0,
-            headers={
-                "Authorization": f"Token {self.api_key}",
-                "Content-Type": "application/json",
-                "Accept": "application/json",
-            },
+        # The AsyncClient is created lazily on first use (see _get_client)
+        # so its pool binds to the running event loop, not whichever
+        # thread happened to construct the service
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_lock = asyncio.Lock()
+        # Fail fast when Patma is down instead of queueing doomed calls
+        self._breaker = CircuitBreaker("patma", is_failure=_is_upstream_failure)
+        # In-flight requests keyed by (url, params), so concurrent
+        # identical calls share a single round-trip
+        self._inflight: Dict[Any, asyncio.Future] = {}
+        # Micro-batch the per-postcode area lookups: concurrent calls
+        # within the loader window flush together as one bounded fan-out
+        # (Patma has no multi-postcode endpoints to collapse into)
+        self._schools_loader = DataLoader(
+            lambda key: self._get_json(
+                f"{self.base_url}/prospector/v1/schools/",
+                {"postcode": key[0], "max_results": key[1]},
+            )
         )
+        self._crime_loader = DataLoader(
+            lambda postcode: self._get_json(
+                f"{self.base_url}/prospector/v1/crime/",
+                {"postcode": postcode},
+            )
+        )
+        self._demographics_loader = DataLoader(
+            lambda postcode: self._get_json(
+                f"{self.base_url}/prospector/v2/demographics/",
+                {"postcode": postcode},
+            )
+        )
+
+    async def _get_client(self) -> httpx.AsyncClient:
+        """
+        Get the shared AsyncClient, creating it on first use.
+
+        Guarded by a lock so concurrent first calls can't build
+        duplicate connection pools.
+        """
+        if self._client is None:
+            async with self._client_lock:
+                if self._client is None:
+                    # HTTP/2 lets the concurrent fan-outs (multi-location
+                    # search, local insights) multiplex over one warm TLS
+                    # session instead of opening a socket per request
+                    self._client = httpx.AsyncClient(
+                        http2=True,
+                        timeout=30.0,
+                        limits=httpx.Limits(
+                            max_connections=20,
+                            max_keepalive_connections=20,
+                            keepalive_expiry=60.0,
+                        ),
+                        headers={
+                            "Authorization": f"Token {self.api_key}",
+                            "Content-Type": "application/json",
+                            "Accept": "application/json",
+                        },
+                    )
+        return self._client
 
     async def close(self) -> None:
-        """Close the HTTP client."""
-        await self.client.aclose()
+        """Close the HTTP client. Safe to call more than once."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _get_json(self, url: str, params: Dict[str, Any]) -> Any:
+        """
+        GET a Patma endpoint through the circuit breaker with retries.
+
+        Transient connection errors are retried with backoff; repeated
+        failures open the breaker so callers fail fast. Concurrent calls
+        with identical url+params coalesce onto one round-trip, which
+        also covers cache misses racing through the TTL-cached getters.
+        """
+        key = (url, tuple(sorted(params.items())))
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await inflight
+
+        async def attempt() -> Any:
+            client = await self._get_client()
+            response = await client.get(url, params=params)
+            response.raise_for_status()
+            # orjson parses the raw bytes directly, skipping the str
+            # decode and the slower stdlib json parse
+            return orjson.loads(response.content)
+
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._breaker.call(
+                lambda: retry(attempt, retry_on=(httpx.RequestError,))
+            )
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved in case no one else is waiting
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
 
     async def search_properties(
         self,
@@ -78,31 +247,42 @@ class PatmaService:
             logger.warning("No locations specified in criteria")
             return []
 
-        all_properties: List[Property] = []
+        # Per-location fetches are independent I/O, so overlap them all:
+        # wall time becomes max(per-location RTT) instead of the sum
+        tasks = [
+            self._fetch_listings(
+                self._build_listing_params(criteria, location, max_results),
+                max_results=max_results,
+            )
+            for location in criteria.locations
+        ]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        # Bounded max-heap keyed by -price: the working set stays at
+        # max_results entries no matter how many candidates come back,
+        # and no final full sort is needed
+        heap: List[tuple] = []
         seen_ids: set = set()
 
-        for location in criteria.locations:
-            try:
-                params = self._build_listing_params(criteria, location, max_results)
-                properties = await self._fetch_listings(params)
-
-                for prop in properties:
-                    if prop.id not in seen_ids:
-                        all_properties.append(prop)
-                        seen_ids.add(prop.id)
-
-                        if len(all_properties) >= max_results:
-                            break
-
-            except Exception as e:
-                logger.error("Error searching properties in %s: %s", location, e)
+        for location, result in zip(criteria.locations, results):
+            if isinstance(result, Exception):
+                logger.error("Error searching properties in %s: %s", location, result)
                 continue
 
-            if len(all_properties) >= max_results:
-                break
+            for prop in result:
+                if prop.id in seen_ids:
+                    continue
+                seen_ids.add(prop.id)
+
+                entry = (-prop.price, prop.id, prop)
+                if len(heap) < max_results:
+                    heapq.heappush(heap, entry)
+                elif entry > heap[0]:
+                    # Cheaper than the most expensive retained property
+                    heapq.heappushpop(heap, entry)
 
-        all_properties.sort(key=lambda p: p.price)
-        return all_properties[:max_results]
+        # Descending on -price is ascending on price
+        return [prop for _, _, prop in sorted(heap, reverse=True)]
 
     def _build_listing_params(
         self,
@@ -146,13 +326,17 @@ class PatmaService:
             if mapped_type:
                 params["property_type"] = mapped_type
 
-        # Check preferences for special filters
-        prefs_lower = [p.lower() for p in criteria.preferences]
-        if any("no chain" in p for p in prefs_lower):
+        # Check preferences for special filters in one linear scan
+        flags = {
+            match.group(1).lower()
+            for preference in criteria.preferences
+            for match in _PREF_RE.finditer(preference)
+        }
+        if "no chain" in flags:
             params["no_chain"] = True
-        if any("refurb" in p or "renovation" in p for p in prefs_lower):
+        if "refurb" in flags or "renovation" in flags:
             params["needs_refurb"] = True
-        if any("reduced" in p or "discount" in p for p in prefs_lower):
+        if "reduced" in flags or "discount" in flags:
             params["reduced_percent_gte"] = 5
 
         return params
@@ -160,31 +344,81 @@ class PatmaService:
     async def _fetch_listings(
         self,
         params: Dict[str, Any],
+        max_results: Optional[int] = None,
     ) -> List[Property]:
         """
         Fetch property listings from Patma API.
 
+        The first page reveals the total count; when more results are
+        wanted than one page holds, the remaining pages are fetched
+        concurrently (bounded fan-out) instead of one after another.
+
         Args:
             params: Query parameters for the search.
+            max_results: Cap on listings to collect across pages;
+                defaults to a single page.
 
         Returns:
-            List of Property objects.
+            List of Property objects, deduplicated by id.
         """
         url = f"{self.base_url}/prospector/v1/property-listing/"
         logger.info("Fetching listings from Patma: %s", url)
 
-        response = await self.client.get(url, params=params)
-        response.raise_for_status()
-
-        data = response.json()
+        data = await self._get_json(url, params)
 
         # Handle paginated response
         results = data.get("results", [])
         if isinstance(data, list):
             results = data
 
-        return self._parse_listings(results)
+        properties = self._parse_listings(results)
+
+        if max_results is None or not isinstance(data, dict) or not results:
+            return properties
+
+        page_size = params.get("page_size") or len(results)
+        total = data.get("count")
+        if total is None and data.get("next"):
+            # A next page exists but the count is unknown; fetch only up
+            # to what the caller asked for
+            total = max_results
+        if not total or page_size <= 0:
+            return properties
+
+        needed = min(total, max_results)
+        last_page = -(-needed // page_size)  # ceil division
+        if last_page <= 1:
+            return properties
+
+        # Prefetch pages 2..K concurrently, capped to stay a good citizen
+        sem = asyncio.Semaphore(8)
+
+        async def fetch_page(page: int) -> List[Property]:
+            async with sem:
+                page_data = await self._get_json(url, {**params, "page": page})
+            page_results = page_data.get("results", [])
+            if isinstance(page_data, list):
+                page_results = page_data
+            return self._parse_listings(page_results)
+
+        pages = await asyncio.gather(
+            *(fetch_page(page) for page in range(2, last_page + 1)),
+            return_exceptions=True,
+        )
+
+        seen_ids = {prop.id for prop in properties}
+        for page_properties in pages:
+            if isinstance(page_properties, Exception):
+                logger.warning("Failed to fetch listings page: %s", page_properties)
+                continue
+            for prop in page_properties:
+                if prop.id not in seen_ids:
+                    properties.append(prop)
+                    seen_ids.add(prop.id)
+
+        return properties
 
+    @async_ttl_cache(ttl=PRICE_CACHE_TTL)
     async def get_asking_prices(
         self,
         location: str,
@@ -213,11 +447,9 @@ class PatmaService:
         url = f"{self.base_url}/prospector/v1/asking-prices/"
         logger.info("Getting asking prices from Patma: %s", url)
 
-        response = await self.client.get(url, params=params)
-        response.raise_for_status()
-
-        return response.json()
+        return await self._get_json(url, params)
 
+    @async_ttl_cache(ttl=PRICE_CACHE_TTL)
     async def get_sold_prices(
         self,
         location: str,
@@ -251,11 +483,9 @@ class PatmaService:
         url = f"{self.base_url}/prospector/v1/sold-prices/"
         logger.info("Getting sold prices from Patma: %s", url)
 
-        response = await self.client.get(url, params=params)
-        response.raise_for_status()
-
-        return response.json()
+        return await self._get_json(url, params)
 
+    @async_ttl_cache(ttl=AREA_CACHE_TTL)
     async def get_price_history(
         self,
         location: str,
@@ -283,11 +513,9 @@ class PatmaService:
         url = f"{self.base_url}/prospector/v1/price-history/"
         logger.info("Getting price history from Patma: %s", url)
 
-        response = await self.client.get(url, params=params)
-        response.raise_for_status()
-
-        return response.json()
+        return await self._get_json(url, params)
 
+    @async_ttl_cache(ttl=AREA_CACHE_TTL)
     async def get_schools(
         self,
         location: str,
@@ -305,19 +533,11 @@ class PatmaService:
         Returns:
             Dictionary with school information.
         """
-        params = {
-            "postcode": location,
-            "max_results": max_results,
-        }
+        logger.info("Getting schools from Patma for %s", location)
 
-        url = f"{self.base_url}/prospector/v1/schools/"
-        logger.info("Getting schools from Patma: %s", url)
-
-        response = await self.client.get(url, params=params)
-        response.raise_for_status()
-
-        return response.json()
+        return await self._schools_loader.load((location, max_results))
 
+    @async_ttl_cache(ttl=AREA_CACHE_TTL)
     async def get_crime_data(
         self,
         location: str,
@@ -333,16 +553,11 @@ class PatmaService:
         Returns:
             Dictionary with crime rating and statistics.
         """
-        params = {"postcode": location}
-
-        url = f"{self.base_url}/prospector/v1/crime/"
-        logger.info("Getting crime data from Patma: %s", url)
+        logger.info("Getting crime data from Patma for %s", location)
 
-        response = await self.client.get(url, params=params)
-        response.raise_for_status()
-
-        return response.json()
+        return await self._crime_loader.load(location)
 
+    @async_ttl_cache(ttl=AREA_CACHE_TTL)
     async def get_demographics(
         self,
         location: str,
@@ -358,15 +573,9 @@ class PatmaService:
         Returns:
             Dictionary with demographic statistics.
         """
-        params = {"postcode": location}
-
-        url = f"{self.base_url}/prospector/v2/demographics/"
-        logger.info("Getting demographics from Patma: %s", url)
+        logger.info("Getting demographics from Patma for %s", location)
 
-        response = await self.client.get(url, params=params)
-        response.raise_for_status()
-
-        return response.json()
+        return await self._demographics_loader.load(location)
 
     async def get_local_insights(
         self,
@@ -385,27 +594,32 @@ class PatmaService:
         """
         insights: Dict[str, Any] = {"postcode": location}
 
-        # Fetch all insights in parallel would be better, but for simplicity:
-        try:
-            insights["schools"] = await self.get_schools(location)
-        except Exception as e:
-            logger.warning("Failed to get schools: %s", e)
-            insights["schools"] = None
+        # The three fetches are independent, so overlap them on the shared
+        # connection pool; each failure degrades to None as before
+        schools, crime, demographics = await asyncio.gather(
+            self.get_schools(location),
+            self.get_crime_data(location),
+            self.get_demographics(location),
+            return_exceptions=True,
+        )
 
-        try:
-            insights["crime"] = await self.get_crime_data(location)
-        except Exception as e:
-            logger.warning("Failed to get crime data: %s", e)
-            insights["crime"] = None
+        if isinstance(schools, Exception):
+            logger.warning("Failed to get schools: %s", schools)
+            schools = None
+        if isinstance(crime, Exception):
+            logger.warning("Failed to get crime data: %s", crime)
+            crime = None
+        if isinstance(demographics, Exception):
+            logger.warning("Failed to get demographics: %s", demographics)
+            demographics = None
 
-        try:
-            insights["demographics"] = await self.get_demographics(location)
-        except Exception as e:
-            logger.warning("Failed to get demographics: %s", e)
-            insights["demographics"] = None
+        insights["schools"] = schools
+        insights["crime"] = crime
+        insights["demographics"] = demographics
 
         return insights
 
+    @async_ttl_cache(ttl=STAMP_DUTY_CACHE_TTL)
     async def calculate_stamp_duty(
         self,
         value: int,
@@ -431,10 +645,7 @@ class PatmaService:
         url = f"{self.base_url}/prospector/v1/stamp-duty/"
         logger.info("Calculating stamp duty via Patma: %s", url)
 
-        response = await self.client.get(url, params=params)
-        response.raise_for_status()
-
-        return response.json()
+        return await self._get_json(url, params)
 
     def _parse_listings(self, results: List[Dict]) -> List[Property]:
         """
@@ -449,48 +660,51 @@ class PatmaService:
         properties = []
 
         for item in results:
+            # Only the numeric coercion genuinely needs a guard; the field
+            # lookups are plain dict reads over the alias tuples
             try:
-                # Extract price - could be in different fields
-                price = (
-                    item.get("price")
-                    or item.get("asking_price")
-                    or item.get("current_price")
-                    or 0
-                )
+                price = _first(item, _PRICE_KEYS, 0)
                 if isinstance(price, str):
-                    price = int(price.replace(",", "").replace("£", ""))
-
-                prop = Property(
-                    id=str(item.get("id", item.get("portal_id", ""))),
-                    address=item.get("address", item.get("full_address", "Unknown")),
-                    price=int(price),
-                    bedrooms=item.get("bedrooms"),
-                    bathrooms=item.get("bathrooms"),
-                    property_type=item.get("property_type", item.get("type")),
-                    description=item.get("description", item.get("summary")),
-                    url=item.get("portal_url", item.get("url", item.get("link"))),
-                    image_url=item.get("image_url", item.get("main_image")),
-                    latitude=item.get("latitude", item.get("lat")),
-                    longitude=item.get("longitude", item.get("lng")),
-                )
-                properties.append(prop)
-
-            except Exception as e:
-                logger.warning("Failed to parse listing: %s - %s", e, item)
+                    price = int(price.translate(_PRICE_TRANS))
+                price = int(price)
+            except (TypeError, ValueError) as e:
+                logger.warning("Failed to parse listing price: %s - %s", e, item)
                 continue
 
+            # Every field is explicitly coerced here — portals send numbers
+            # as strings — so model_construct can skip full validation
+            # without leaking raw values into the response schema
+            properties.append(
+                Property.model_construct(
+                    id=str(_first(item, _ID_KEYS, "")),
+                    address=_first(item, _ADDRESS_KEYS, "Unknown"),
+                    price=price,
+                    bedrooms=_as_int(item.get("bedrooms")),
+                    bathrooms=_as_int(item.get("bathrooms")),
+                    property_type=_first(item, _TYPE_KEYS),
+                    description=_first(item, _DESCRIPTION_KEYS),
+                    url=_first(item, _URL_KEYS),
+                    image_url=_first(item, _IMAGE_KEYS),
+                    latitude=_as_float(_first(item, _LATITUDE_KEYS)),
+                    longitude=_as_float(_first(item, _LONGITUDE_KEYS)),
+                )
+            )
+
         return properties
 
 
 # Dependency injection helper
-_patma_service: Optional[PatmaService] = None
+@lru_cache(maxsize=1)
+def _build_patma_service() -> PatmaService:
+    """Construct the single PatmaService instance for this process."""
+    return PatmaService(get_settings())
 
 
 def get_patma_service(settings: Settings) -> PatmaService:
     """
     Get or create the Patma service singleton.
+
+    Backed by lru_cache rather than a mutable module global, so lazy
+    init is safe under threads.
     """
-    global _patma_service
-    if _patma_service is None:
-        _patma_service = PatmaService(settings)
-    return _patma_service
+    return _build_patma_service()
@@ -0,0 +1,154 @@
+"""
+Resilience primitives for outbound upstream calls.
+
+Provides a CLOSED -> OPEN -> HALF_OPEN circuit breaker and an
+exponential-backoff retry helper. Together they stop a failing
+upstream (Claude or Patma) from tying up the event loop with doomed
+calls while client retries amplify the load.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Optional, Tuple, Type
+
+logger = logging.getLogger(__name__)
+
+# Breaker states
+_CLOSED = "closed"
+_OPEN = "open"
+_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Fail-fast guard around an unreliable upstream.
+
+    After failure_threshold consecutive failures the breaker opens and
+    rejects calls immediately. Once reset_seconds have passed, a single
+    probe call is let through (half-open); success closes the breaker,
+    failure re-opens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_seconds: float = 30.0,
+        is_failure: Optional[Callable[[BaseException], bool]] = None,
+    ) -> None:
+        """
+        Initialize the breaker.
+
+        Args:
+            name: Upstream name used in logs and error messages.
+            failure_threshold: Consecutive failures before opening.
+            reset_seconds: Time the breaker stays open before probing.
+            is_failure: Predicate deciding whether an exception counts
+                toward opening the breaker. Defaults to counting every
+                exception; callers should exclude caller mistakes (e.g.
+                4xx responses) so user input can't open the circuit.
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._is_failure = is_failure or (lambda exc: True)
+        self._state = _CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+
+    def _allow(self) -> bool:
+        """Decide whether a call may proceed, transitioning state if due."""
+        if self._state == _OPEN:
+            if time.monotonic() - self._opened_at >= self.reset_seconds:
+                self._state = _HALF_OPEN
+                logger.info("Circuit %s half-open, allowing probe call", self.name)
+                return True
+            return False
+        return True
+
+    def _record_success(self) -> None:
+        if self._state != _CLOSED:
+            logger.info("Circuit %s closed after successful call", self.name)
+        self._state = _CLOSED
+        self._failures = 0
+
+    def _record_failure(self) -> None:
+        self._failures += 1
+        if self._state == _HALF_OPEN or self._failures >= self.failure_threshold:
+            self._state = _OPEN
+            self._opened_at = time.monotonic()
+            logger.warning(
+                "Circuit %s opened after %d consecutive failures",
+                self.name,
+                self._failures,
+            )
+
+    async def call(self, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run func through the breaker.
+
+        Args:
+            func: Zero-argument coroutine function performing the call.
+
+        Returns:
+            The result of func.
+
+        Raises:
+            CircuitOpenError: If the breaker is open.
+        """
+        if not self._allow():
+            raise CircuitOpenError(f"{self.name} circuit is open, failing fast")
+
+        try:
+            result = await func()
+        except Exception as e:
+            # Only count exceptions that indicate upstream trouble; a 4xx
+            # caused by caller input reaches the upstream fine and must
+            # not push the breaker towards open
+            if self._is_failure(e):
+                self._record_failure()
+            raise
+
+        self._record_success()
+        return result
+
+
+async def retry(
+    func: Callable[[], Awaitable[Any]],
+    retries: int = 3,
+    base: float = 0.1,
+    retry_on: Tuple[Type[BaseException], ...] = (Exception,),
+) -> Any:
+    """
+    Call func, retrying transient failures with exponential backoff.
+
+    Args:
+        func: Zero-argument coroutine function performing the call.
+        retries: Total number of attempts.
+        base: Base delay in seconds; attempt i sleeps base * 2**i plus jitter.
+        retry_on: Exception types considered transient.
+
+    Returns:
+        The result of the first successful attempt.
+    """
+    for attempt in range(retries):
+        try:
+            return await func()
+        except retry_on as e:
+            if attempt == retries - 1:
+                raise
+            delay = base * 2**attempt + random.random() * 0.05
+            logger.warning(
+                "Transient failure (%s), retrying in %.2fs (attempt %d/%d)",
+                e,
+                delay,
+                attempt + 1,
+                retries,
+            )
+            await asyncio.sleep(delay)
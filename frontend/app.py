@@ -5,10 +5,13 @@ A chat-style interface for natural language property search,
 similar to Claude.ai's conversation UI.
 """
 
-import json
+import asyncio
+import random
+import threading
 from typing import List
 
 import httpx
+import orjson
 import streamlit as st
 
 # Configuration
@@ -33,6 +36,65 @@ def init_session_state():
         st.session_state.messages = []
 
 
+@st.cache_resource
+def get_async_runtime():
+    """
+    Get the shared background event loop and async HTTP client.
+
+    Cached as a resource so Streamlit's script reruns reuse one client
+    (and its keep-alive connection pool) instead of paying a fresh
+    TCP+TLS handshake on every search. The loop runs in a daemon
+    thread because a pooled AsyncClient has to stay bound to one
+    long-lived loop — per-call asyncio.run would discard the pool with
+    each throwaway loop — and it leaves room for concurrent calls
+    (e.g. prefetching) without blocking the script thread's own work.
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(
+        target=loop.run_forever, name="frontend-http", daemon=True
+    ).start()
+
+    async def build_client() -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=API_BASE_URL,
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=100,
+                max_keepalive_connections=20,
+                keepalive_expiry=30.0,
+            ),
+            timeout=httpx.Timeout(30.0, connect=5.0),
+        )
+
+    client = asyncio.run_coroutine_threadsafe(build_client(), loop).result()
+    return loop, client
+
+
+async def _post_search(client: httpx.AsyncClient, query: str) -> dict:
+    """Send the search request and decode the response body."""
+    response = await client.post("/api/search", json={"query": query})
+    response.raise_for_status()
+    # orjson decodes large listing payloads several times faster than
+    # the stdlib decoder behind response.json()
+    return orjson.loads(response.content)
+
+
+@st.cache_data(ttl=300, max_entries=128, show_spinner=False)
+def _search_cached(query: str) -> dict:
+    """
+    Fetch and decode a search response, memoized per query string.
+
+    Chat users retype and re-click the same queries; a short-TTL cache
+    serves those straight from memory instead of re-running the whole
+    extraction + search pipeline. Failures propagate as exceptions so
+    st.cache_data never memoizes an error for the TTL.
+    """
+    loop, client = get_async_runtime()
+    return asyncio.run_coroutine_threadsafe(
+        _post_search(client, query), loop
+    ).result()
+
+
 def search_properties(query: str) -> dict:
     """
     Call the backend API to search for properties.
@@ -44,20 +106,14 @@ def search_properties(query: str) -> dict:
         API response with criteria and properties.
     """
     try:
-        with httpx.Client(timeout=30.0) as client:
-            response = client.post(
-                f"{API_BASE_URL}/api/search",
-                json={"query": query},
-            )
-            response.raise_for_status()
-            return response.json()
+        return _search_cached(query)
     except httpx.ConnectError:
         return {
             "error": "Cannot connect to the API server. Make sure the backend is running with: `uvicorn app.main:app --reload`"
         }
     except httpx.HTTPStatusError as e:
         try:
-            error_detail = e.response.json().get("detail", str(e))
+            error_detail = orjson.loads(e.response.content).get("detail", str(e))
         except Exception:
             error_detail = str(e)
         return {"error": error_detail}
@@ -67,105 +123,127 @@ def search_properties(query: str) -> dict:
 
 def format_criteria(criteria: dict) -> str:
     """Format extracted criteria as readable markdown."""
-    parts = []
-
-    if criteria.get("locations"):
-        parts.append(f"**Locations:** {', '.join(criteria['locations'])}")
-
-    bedrooms = []
-    if criteria.get("min_bedrooms"):
-        bedrooms.append(f"min {criteria['min_bedrooms']}")
-    if criteria.get("max_bedrooms"):
-        bedrooms.append(f"max {criteria['max_bedrooms']}")
-    if bedrooms:
-        parts.append(f"**Bedrooms:** {', '.join(bedrooms)}")
-
-    price = []
-    if criteria.get("min_price"):
-        price.append(f"min £{criteria['min_price']:,}")
-    if criteria.get("max_price"):
-        price.append(f"max £{criteria['max_price']:,}")
-    if price:
-        parts.append(f"**Price:** {', '.join(price)}")
-
-    if criteria.get("property_types"):
-        parts.append(f"**Property Types:** {', '.join(criteria['property_types'])}")
-
-    if criteria.get("preferences"):
-        parts.append(f"**Preferences:** {', '.join(criteria['preferences'])}")
-
-    if criteria.get("deal_breakers"):
-        parts.append(f"**Avoid:** {', '.join(criteria['deal_breakers'])}")
+    # Resolve each field once; this runs in the assistant-message hot path
+    locations = criteria.get("locations")
+    min_bedrooms = criteria.get("min_bedrooms")
+    max_bedrooms = criteria.get("max_bedrooms")
+    min_price = criteria.get("min_price")
+    max_price = criteria.get("max_price")
+    property_types = criteria.get("property_types")
+    preferences = criteria.get("preferences")
+    deal_breakers = criteria.get("deal_breakers")
+
+    bedrooms = ", ".join(
+        filter(
+            None,
+            (
+                f"min {min_bedrooms}" if min_bedrooms else None,
+                f"max {max_bedrooms}" if max_bedrooms else None,
+            ),
+        )
+    )
+    price = ", ".join(
+        filter(
+            None,
+            (
+                f"min £{min_price:,}" if min_price else None,
+                f"max £{max_price:,}" if max_price else None,
+            ),
+        )
+    )
 
-    return "\n".join(parts) if parts else "No specific criteria extracted."
+    formatted = "\n".join(
+        filter(
+            None,
+            (
+                f"**Locations:** {', '.join(locations)}" if locations else None,
+                f"**Bedrooms:** {bedrooms}" if bedrooms else None,
+                f"**Price:** {price}" if price else None,
+                f"**Property Types:** {', '.join(property_types)}"
+                if property_types
+                else None,
+                f"**Preferences:** {', '.join(preferences)}" if preferences else None,
+                f"**Avoid:** {', '.join(deal_breakers)}" if deal_breakers else None,
+            ),
+        )
+    )
+    return formatted or "No specific criteria extracted."
 
 
 def format_property(prop: dict, index: int) -> str:
     """Format a single property as markdown."""
-    lines = []
-
-    # Property header with address
     address = prop.get("address", "Unknown Address")
     price = prop.get("price", 0)
-    lines.append(f"**{index}. {address}**")
-    lines.append(f"£{price:,}")
-
-    # Property details
-    details = []
-    if prop.get("bedrooms"):
-        details.append(f"{prop['bedrooms']} bed")
-    if prop.get("bathrooms"):
-        details.append(f"{prop['bathrooms']} bath")
-    if prop.get("property_type"):
-        details.append(prop["property_type"])
-    if details:
-        lines.append(" | ".join(details))
-
-    # Description snippet
-    if prop.get("description"):
-        desc = prop["description"]
-        if len(desc) > 150:
-            desc = desc[:150] + "..."
-        lines.append(f"\n_{desc}_")
-
-    # Link to listing
-    if prop.get("url"):
-        lines.append(f"\n[View on portal]({prop['url']})")
-
-    return "\n".join(lines)
-
-
-def format_response(data: dict) -> str:
-    """Format the full API response as a chat message."""
-    if "error" in data:
-        return f"**Error:** {data['error']}"
+    bedrooms = prop.get("bedrooms")
+    bathrooms = prop.get("bathrooms")
+    property_type = prop.get("property_type")
+    desc = prop.get("description")
+    url = prop.get("url")
+
+    details = " | ".join(
+        filter(
+            None,
+            (
+                f"{bedrooms} bed" if bedrooms else None,
+                f"{bathrooms} bath" if bathrooms else None,
+                property_type,
+            ),
+        )
+    )
 
-    parts = []
+    return "\n".join(
+        filter(
+            None,
+            (
+                f"**{index}. {address}**",
+                f"£{price:,}",
+                details,
+                # Description snippet, truncated inline
+                f"\n_{desc if len(desc) <= 150 else desc[:150] + '...'}_"
+                if desc
+                else None,
+                f"\n[View on portal]({url})" if url else None,
+            ),
+        )
+    )
 
-    # Add message
-    if data.get("message"):
-        parts.append(data["message"])
 
-    # Add extracted criteria
-    if data.get("criteria"):
-        parts.append("\n---\n**Search Criteria Extracted:**\n")
-        parts.append(format_criteria(data["criteria"]))
+def stream_response(data: dict):
+    """
+    Yield the formatted API response as incremental markdown chunks.
 
-    # Add properties
+    Passed to st.write_stream so the summary, criteria, and each
+    property card paint as soon as they are formatted instead of
+    waiting on the full message; concatenated, the chunks form the
+    complete assistant message.
+    """
+    if "error" in data:
+        yield f"**Error:** {data['error']}"
+        return
+
+    message = data.get("message")
+    criteria = data.get("criteria")
     properties = data.get("properties", [])
+
+    if message:
+        yield message
+
+    if criteria:
+        yield f"\n\n---\n**Search Criteria Extracted:**\n\n{format_criteria(criteria)}"
+
     if properties:
-        parts.append(f"\n---\n**Properties Found ({len(properties)}):**\n")
-        for i, prop in enumerate(properties[:5], 1):  # Show first 5
-            parts.append(format_property(prop, i))
-            parts.append("")  # Add spacing
+        yield f"\n\n---\n**Properties Found ({len(properties)}):**\n\n"
+        # Show first 5
+        for i, prop in enumerate(properties[:5], 1):
+            yield f"{format_property(prop, i)}\n\n"
 
         if len(properties) > 5:
-            parts.append(f"\n*...and {len(properties) - 5} more properties available*")
-    elif data.get("criteria", {}).get("locations"):
-        parts.append("\n---\n**No properties found matching your criteria.**")
-        parts.append("Try broadening your search or adjusting your requirements.")
-
-    return "\n".join(parts)
+            yield f"\n*...and {len(properties) - 5} more properties available*"
+    elif criteria and criteria.get("locations"):
+        yield (
+            "\n\n---\n**No properties found matching your criteria.**\n"
+            "Try broadening your search or adjusting your requirements."
+        )
 
 
 def render_chat_history():
@@ -176,37 +254,48 @@ def render_chat_history():
 
 
 def process_query(query: str):
-    """Process a user query and get response from API."""
-    # Add user message to history
+    """Process a user query and stream the response into the chat."""
     st.session_state.messages.append({"role": "user", "content": query})
 
-    # Display user message
     with st.chat_message("user"):
         st.markdown(query)
 
-    # Get and display assistant response
+    # Stream the formatted response so the first property is visible
+    # before the later ones are formatted; write_stream returns the
+    # concatenated message for the history
     with st.chat_message("assistant"):
         with st.spinner("Searching for properties..."):
             response = search_properties(query)
-            formatted = format_response(response)
+        formatted = st.write_stream(stream_response(response))
 
-        st.markdown(formatted)
-        st.session_state.messages.append({"role": "assistant", "content": formatted})
+    st.session_state.messages.append({"role": "assistant", "content": formatted})
 
 
-def inject_cycling_placeholder_js():
-    """Inject JavaScript to cycle through example placeholders."""
-    examples_json = json.dumps(EXAMPLE_QUERIES)
+# Shuffled and serialized once at import: the placeholder script cycles
+# an index through this fixed order, so the rotation varies between
+# server starts without any per-rerun PRNG work or re-serialization
+_SHUFFLED_EXAMPLES = random.sample(EXAMPLE_QUERIES, len(EXAMPLE_QUERIES))
+_EXAMPLES_JSON = orjson.dumps(_SHUFFLED_EXAMPLES).decode()
 
-    js_code = f"""
+# Placeholder-cycling script, built once at import time
+_PLACEHOLDER_JS = f"""
     <script>
     (function() {{
-        const examples = {examples_json};
+        const examples = {_EXAMPLES_JSON};
         let currentIndex = 0;
         let lastUpdate = 0;
+        let cachedInput = null;
+
+        // Cache the textarea lookup; querySelector walks the DOM each call,
+        // so re-resolve only after Streamlit replaces the node
+        function getInput() {{
+            if (cachedInput && document.contains(cachedInput)) return cachedInput;
+            cachedInput = document.querySelector('textarea[data-testid="stChatInputTextArea"]');
+            return cachedInput;
+        }}
 
         function updatePlaceholder(force) {{
-            const input = document.querySelector('textarea[data-testid="stChatInputTextArea"]');
+            const input = getInput();
             if (input) {{
                 const now = Date.now();
                 // Only cycle to next example every 3 seconds
@@ -228,34 +317,40 @@ def inject_cycling_placeholder_js():
         // Cycle every 3 seconds
         setInterval(function() {{ updatePlaceholder(true); }}, 3000);
 
-        // Aggressively maintain placeholder on any DOM changes
-        const observer = new MutationObserver(function(mutations) {{
-            updatePlaceholder(false);
+        // Maintain the placeholder when Streamlit rewrites the DOM, but
+        // throttle to one update per animation frame — Streamlit mutates
+        // constantly and a per-mutation callback janks the main thread
+        let scheduled = false;
+        const observer = new MutationObserver(function() {{
+            if (scheduled) return;
+            scheduled = true;
+            requestAnimationFrame(function() {{
+                scheduled = false;
+                updatePlaceholder(false);
+            }});
         }});
 
-        observer.observe(document.body, {{ childList: true, subtree: true }});
-
-        // Also check frequently to override Streamlit's placeholder
-        setInterval(function() {{ updatePlaceholder(false); }}, 100);
+        // Watch only the chat input when it exists; the 3s interval above
+        // already drives the cycling
+        const target = document.querySelector('[data-testid="stChatInput"]') || document.body;
+        observer.observe(target, {{ childList: true, subtree: true }});
     }})();
     </script>
     """
-    st.markdown(js_code, unsafe_allow_html=True)
 
 
-def main():
-    """Main application entry point."""
-    # Page configuration
-    st.set_page_config(
-        page_title="Property Search",
-        page_icon="🏠",
-        layout="centered",
-        initial_sidebar_state="collapsed",
-    )
-
-    # Custom CSS for centered chat input and styling
-    st.markdown(
+# Static welcome screen, built once at import
+_WELCOME_HTML = """
+        <div class="welcome-container">
+            <div class="welcome-title">Property Search</div>
+            <div class="welcome-subtitle">
+                Describe your ideal property and I'll help you find it
+            </div>
+        </div>
         """
+
+# Custom CSS for centered chat input and styling, built once at import
+_CSS = """
         <style>
         /* Import Rubik font from Google Fonts */
         @import url('https://fonts.googleapis.com/css2?family=Rubik:wght@300;400;500;600;700&display=swap');
@@ -443,29 +538,32 @@ def main():
             transform: translateX(-50%) !important;
         }
         </style>
-        """,
-        unsafe_allow_html=True,
+        """
+
+# Injected as one st.markdown call: each call is a separate delta over
+# Streamlit's websocket and a separate DOM node render on the client
+_STATIC_ASSETS = _CSS + _PLACEHOLDER_JS
+
+
+def main():
+    """Main application entry point."""
+    # Page configuration
+    st.set_page_config(
+        page_title="Property Search",
+        page_icon="🏠",
+        layout="centered",
+        initial_sidebar_state="collapsed",
     )
 
+    # Custom CSS plus the cycling-placeholder script, injected together
+    st.markdown(_STATIC_ASSETS, unsafe_allow_html=True)
+
     # Initialize session state
     init_session_state()
 
-    # Inject JavaScript for cycling placeholders
-    inject_cycling_placeholder_js()
-
     # Show welcome screen or chat history
     if not st.session_state.messages:
-        st.markdown(
-            """
-            <div class="welcome-container">
-                <div class="welcome-title">Property Search</div>
-                <div class="welcome-subtitle">
-                    Describe your ideal property and I'll help you find it
-                </div>
-            </div>
-            """,
-            unsafe_allow_html=True,
-        )
+        st.markdown(_WELCOME_HTML, unsafe_allow_html=True)
     else:
         # Add class to body to indicate we have messages (moves chat input to bottom)
         st.markdown(
@@ -502,8 +600,13 @@ def main():
 
     # Chat input (centered via CSS, placeholder set by JavaScript)
     if prompt := st.chat_input(" "):
+        had_messages = bool(st.session_state.messages)
         process_query(prompt)
-        st.rerun()
+        # The streamed render above is the only draw for this turn; only
+        # the first exchange reruns, to swap the welcome layout for the
+        # chat layout (history render then picks the turn up from state)
+        if not had_messages:
+            st.rerun()
 
 
 if __name__ == "__main__":